@@ -0,0 +1,321 @@
+"""
+NativeEcho - Concurrent Session Load Test
+
+Drives many simultaneous AppTest sessions through scripted chat and vocabulary
+flows inside one process (like one Streamlit server), against the local mock
+backends from bench/mocks.py. Concurrency is ramped step by step and each step
+reports:
+- Throughput (script reruns per second)
+- Rerun latency p50 / p95 / p99
+- Peak thread count
+- RSS growth per session
+
+The saturation point is the first step where throughput stops growing or p95
+latency more than doubles versus one session. Save a run with --json and pass
+it as --baseline later to fail (exit code 1) on regressions.
+
+--response-cache adds a check after the ramp. Fresh sessions, which load the
+chat history the ramp left behind, open with the same greeting and the greeting
+cache turned on. The run fails (exit code 1) if none of those greetings hit.
+
+The numbers cover script reruns inside one process: script execution, session
+state, widget handling and backend calls to the mocks. They exclude script
+compilation (done once before the ramp, as a real server caches bytecode),
+the websocket/protobuf transport and browser rendering, and real network or
+LLM latency beyond the --llm-latency delay.
+
+Usage:
+    python bench/load_test.py [--ramp 1 2 4 8 16] [--turns 3] [--llm-latency 0.5] [--response-cache]
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import re
+import resource
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from mocks import serve
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "streamlit_app.py")
+CHAT_SCRIPT = [
+    "Hi, how are you today?",
+    "I went hiking with my family last weekend.",
+    "My daughter loved the waterfall but she was tired after.",
+    "Do you have any tips for staying motivated at work?",
+]
+# A regression is a p95 increase or throughput drop beyond this ratio
+REGRESSION_TOLERANCE = 0.2
+
+# =============================================================================
+# Process Metrics
+# =============================================================================
+def current_rss_mb() -> float:
+    """Resident set size of this process in MB."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except FileNotFoundError:
+        # macOS: fall back to the peak RSS (reported in bytes there)
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 2**20
+
+class ResourceSampler(threading.Thread):
+    """Samples thread count and RSS in the background, keeping the peaks."""
+
+    def __init__(self, interval: float = 0.05):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.peak_threads = 0
+        self.peak_rss = 0.0
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.is_set():
+            self.peak_threads = max(self.peak_threads, threading.active_count())
+            self.peak_rss = max(self.peak_rss, current_rss_mb())
+            self.stopped.wait(self.interval)
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+# =============================================================================
+# Session Flow
+# =============================================================================
+def run_session(session_id: int, args, latencies: list, errors: list):
+    """Run one learner's scripted flow, appending each rerun's latency in seconds."""
+    from streamlit.testing.v1 import AppTest
+
+    # Secrets come from install_secrets(); AppTest.secrets would swap the
+    # global st.secrets on every run and race between concurrent sessions
+    at = AppTest.from_file(APP_PATH, default_timeout=args.timeout)
+
+    def step(action):
+        start = time.perf_counter()
+        try:
+            action()
+            # The app reports backend failures with st.error rather than raising
+            if at.exception:
+                errors.append(at.exception[0].message)
+            elif at.error:
+                errors.append(at.error[0].value)
+        except Exception as e:
+            errors.append(str(e))
+        latencies.append(time.perf_counter() - start)
+
+    step(at.run)
+    for turn in range(args.turns):
+        message = CHAT_SCRIPT[turn % len(CHAT_SCRIPT)]
+        step(lambda: at.chat_input[0].set_value(message).run())
+
+    step(lambda: at.sidebar.radio(key="nav_page").set_value("📚 Vocabulary").run())
+    step(lambda: at.text_input(key="vocab_tab_phrase").set_value(f"rain check {session_id}").run())
+    step(lambda: at.button(key="vocab_tab_add_btn").click().run())
+    step(lambda: at.sidebar.radio(key="nav_page").set_value("📈 Progress").run())
+    step(lambda: at.sidebar.radio(key="nav_page").set_value("💬 Chat").run())
+
+def run_level(sessions: int, args) -> dict:
+    """Run `sessions` concurrent sessions and return the step's metrics."""
+    latencies, errors = [], []
+    baseline_rss = current_rss_mb()
+    sampler = ResourceSampler()
+    sampler.start()
+
+    start = time.perf_counter()
+    threads = [
+        threading.Thread(target=run_session, args=(i, args, latencies, errors))
+        for i in range(sessions)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    sampler.stop()
+
+    quantiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+    return {
+        "sessions": sessions,
+        "reruns": len(latencies),
+        "throughput": len(latencies) / elapsed,
+        "p50": quantiles[49],
+        "p95": quantiles[94],
+        "p99": quantiles[98],
+        "peak_threads": sampler.peak_threads,
+        "rss_per_session_mb": max(0.0, sampler.peak_rss - baseline_rss) / sessions,
+        "errors": len(errors),
+        "sample_errors": sorted(set(errors))[:3],
+    }
+
+def check_response_cache(args, sessions: int = 4) -> int:
+    """Greet from fresh sessions with loaded history; return the cache hit count."""
+    from streamlit.testing.v1 import AppTest
+
+    hits = 0
+    for _ in range(sessions):
+        at = AppTest.from_file(APP_PATH, default_timeout=args.timeout)
+        at.run()
+        at.sidebar.toggle(key="use_response_cache").set_value(True).run()
+        at.chat_input[0].set_value(CHAT_SCRIPT[0]).run()
+        # The caption shows the process-wide cache counters
+        for caption in at.sidebar.caption:
+            if match := re.match(r"Cache: (\d+) hits", caption.value):
+                hits = int(match.group(1))
+    return hits
+
+def find_saturation(results: list) -> int | None:
+    """Return the first concurrency level where scaling breaks down, if any."""
+    for previous, current in zip(results, results[1:]):
+        if current["throughput"] < previous["throughput"] * 1.1 or current["p95"] > results[0]["p95"] * 2:
+            return current["sessions"]
+    return None
+
+def compare_to_baseline(results: list, baseline: list) -> list:
+    """Describe steps that regressed versus a saved run."""
+    previous = {step["sessions"]: step for step in baseline}
+    regressions = []
+    for step in results:
+        old = previous.get(step["sessions"])
+        if not old:
+            continue
+        if step["p95"] > old["p95"] * (1 + REGRESSION_TOLERANCE):
+            regressions.append(f"{step['sessions']} sessions: p95 {old['p95']:.2f}s -> {step['p95']:.2f}s")
+        if step["throughput"] < old["throughput"] * (1 - REGRESSION_TOLERANCE):
+            regressions.append(f"{step['sessions']} sessions: throughput {old['throughput']:.1f}/s -> {step['throughput']:.1f}/s")
+    return regressions
+
+# =============================================================================
+# Entry Point
+# =============================================================================
+def patch_apptest_for_concurrency():
+    """Make AppTest safe to run from many threads at once.
+
+    AppTest installs a mock Runtime for each run and clears it afterwards,
+    which would pull it out from under sessions running concurrently, so one
+    mock runtime is kept visible to all of them. AppTest also builds a fresh
+    ScriptCache per run and recompiles the script each time, and concurrent
+    ast.parse calls can fail on CPython 3.11 ("AST constructor recursion depth
+    mismatch"). The app is therefore compiled once up front and its bytecode
+    reused, as a real server's shared ScriptCache would, with no lock on the
+    rerun path.
+    """
+    from streamlit.runtime.runtime import Runtime
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+
+    shared = {}
+    original_instance = Runtime.instance.__func__
+
+    def instance(cls):
+        if cls._instance is not None:
+            shared["runtime"] = cls._instance
+            return cls._instance
+        return shared.get("runtime") or original_instance(cls)
+
+    Runtime.instance = classmethod(instance)
+    Runtime.exists = classmethod(lambda cls: cls._instance is not None or "runtime" in shared)
+
+    original_get_bytecode = ScriptCache.get_bytecode
+    bytecode = {os.path.abspath(APP_PATH): original_get_bytecode(ScriptCache(), APP_PATH)}
+
+    def get_bytecode(self, script_path):
+        cached = bytecode.get(os.path.abspath(script_path))
+        return cached if cached is not None else original_get_bytecode(self, script_path)
+
+    ScriptCache.get_bytecode = get_bytecode
+
+def install_secrets(args):
+    """Point st.secrets at the mock backends for every session in this process."""
+    import streamlit as st
+    from streamlit import config
+    from streamlit.runtime.secrets import Secrets
+
+    path = os.path.join(tempfile.mkdtemp(prefix="nativeecho-load-"), "secrets.toml")
+    with open(path, "w") as f:
+        f.write(
+            f'[supabase]\nurl = "http://127.0.0.1:{args.supabase_port}"\nkey = "load-test"\n\n'
+            f'[siliconflow]\napi_key = "load-test"\nbase_url = "http://127.0.0.1:{args.llm_port}/v1"\nmodel = "mock-model"\n'
+        )
+    config.set_option("secrets.files", [path])
+    st.secrets = Secrets()
+
+def wait_for_port(port: int, timeout: float = 10):
+    """Block until a mock server accepts connections."""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/rest/v1/chat_logs", timeout=1)
+            return
+        except Exception:
+            time.sleep(0.1)
+    raise RuntimeError(f"Mock server on port {port} did not start")
+
+def main():
+    """Run the ramped load test and print a report."""
+    parser = argparse.ArgumentParser(description="Load-test NativeEcho with concurrent sessions.")
+    parser.add_argument("--ramp", type=int, nargs="+", default=[1, 2, 4, 8, 16], help="Concurrent sessions per step")
+    parser.add_argument("--turns", type=int, default=3, help="Chat messages per session")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="Mock LLM seconds per completion")
+    parser.add_argument("--timeout", type=float, default=120, help="Seconds allowed per rerun")
+    parser.add_argument("--supabase-port", type=int, default=54321)
+    parser.add_argument("--llm-port", type=int, default=54322)
+    parser.add_argument("--json", metavar="PATH", help="Write results to this file")
+    parser.add_argument("--baseline", metavar="PATH", help="Compare against a previous --json run")
+    parser.add_argument("--response-cache", action="store_true", help="Check that greetings after loaded history hit the cache")
+    args = parser.parse_args()
+
+    # Mocks run in a separate process so they don't skew threads/RSS
+    mocks = multiprocessing.Process(
+        target=serve, args=(args.supabase_port, args.llm_port, args.llm_latency), daemon=True
+    )
+    mocks.start()
+    install_secrets(args)
+    patch_apptest_for_concurrency()
+    try:
+        wait_for_port(args.supabase_port)
+        run_level(1, args)  # warm-up: imports and cached resources
+
+        results = []
+        print(f"{'sessions':>8} {'reruns/s':>9} {'p50':>7} {'p95':>7} {'p99':>7} {'threads':>8} {'MB/sess':>8} {'errors':>7}")
+        for sessions in args.ramp:
+            step = run_level(sessions, args)
+            results.append(step)
+            print(
+                f"{step['sessions']:>8} {step['throughput']:>9.2f} {step['p50']:>6.2f}s {step['p95']:>6.2f}s "
+                f"{step['p99']:>6.2f}s {step['peak_threads']:>8} {step['rss_per_session_mb']:>8.1f} {step['errors']:>7}"
+            )
+            for error in step["sample_errors"]:
+                print(f"         error: {error}")
+        cache_hits = check_response_cache(args) if args.response_cache else None
+    finally:
+        mocks.terminate()
+
+    saturation = find_saturation(results)
+    print(f"\nSaturation: {f'~{saturation} sessions' if saturation else 'not reached'}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"args": vars(args), "results": results, "saturation": saturation}, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare_to_baseline(results, json.load(f)["results"])
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+
+    if cache_hits is not None:
+        print(f"Response cache hits after loaded history: {cache_hits}")
+        if not cache_hits:
+            print("CHECK FAILED: greetings after loaded chat history never hit the response cache")
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,305 @@
+"""
+NativeEcho - Mock Backends
+
+Local stand-ins for Supabase (PostgREST) and an OpenAI-compatible chat API,
+used by the load test so runs are repeatable and cost nothing.
+
+- MockSupabaseHandler: in-memory tables behind /rest/v1/<table> supporting the
+  filters the app uses (eq, gt, in, order, limit), insert/upsert, update and
+  delete, the vocab_status_counts view and the analytics and feedback RPCs.
+- MockLLMHandler: /v1/chat/completions with a configurable response delay;
+  Polisher prompts get a JSON analysis, chat prompts get a short reply.
+
+Usage:
+    python bench/mocks.py [--supabase-port 54321] [--llm-port 54322] [--llm-latency 0.5]
+"""
+
+import argparse
+import csv
+import json
+import random
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+# =============================================================================
+# Mock Supabase (PostgREST subset)
+# =============================================================================
+class MockDatabase:
+    """Thread-safe in-memory tables."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.tables = defaultdict(list)
+        self.next_id = defaultdict(lambda: 1)
+
+    def insert(self, table: str, rows: list, upsert: bool = False) -> list:
+        """Insert rows (or merge them on id when upserting) and return them."""
+        now = datetime.now(timezone.utc).isoformat()
+        saved = []
+        with self.lock:
+            existing = {row["id"]: row for row in self.tables[table]} if upsert else {}
+            for row in rows:
+                if upsert and row.get("id") in existing:
+                    existing[row["id"]].update(row)
+                    saved.append(dict(existing[row["id"]]))
+                    continue
+                row = {"created_at": now, **row}
+                row.setdefault("id", self.next_id[table])
+                self.next_id[table] = max(self.next_id[table], row["id"]) + 1
+                self.tables[table].append(row)
+                saved.append(dict(row))
+        return saved
+
+    def select(self, table: str, filters: list, order: str | None, limit: int | None) -> list:
+        """Return rows matching all filters, ordered and limited."""
+        with self.lock:
+            rows = [dict(row) for row in self.tables[table] if all(match(row, f) for f in filters)]
+        if order:
+            column, _, direction = order.partition(".")
+            rows.sort(key=lambda row: (row.get(column) is None, row.get(column)), reverse=direction.startswith("desc"))
+        return rows[:limit] if limit is not None else rows
+
+    def update(self, table: str, filters: list, values: dict) -> list:
+        """Update matching rows and return them."""
+        with self.lock:
+            updated = []
+            for row in self.tables[table]:
+                if all(match(row, f) for f in filters):
+                    row.update(values)
+                    updated.append(dict(row))
+        return updated
+
+    def delete(self, table: str, filters: list) -> list:
+        """Delete matching rows and return them."""
+        with self.lock:
+            keep, deleted = [], []
+            for row in self.tables[table]:
+                (deleted if all(match(row, f) for f in filters) else keep).append(row)
+            self.tables[table] = keep
+        return deleted
+
+def parse_filter(column: str, expression: str) -> tuple:
+    """Parse a PostgREST filter such as `eq.active`, `gt.10` or `in.("a","b")`."""
+    operator, _, value = expression.partition(".")
+    if operator == "in":
+        reader = csv.reader([value[1:-1]], quotechar='"', escapechar="\\", doublequote=False)
+        return column, operator, next(reader, [])
+    return column, operator, value
+
+def match(row: dict, condition: tuple) -> bool:
+    """Check a row against a parsed filter (values compare as strings, ids as ints)."""
+    column, operator, value = condition
+    actual = row.get(column)
+    if operator == "eq":
+        return str(actual) == value
+    if operator == "gt":
+        return actual is not None and int(actual) > int(value)
+    if operator == "in":
+        return str(actual) in value
+    raise ValueError(f"Unsupported filter operator: {operator}")
+
+def vocab_status_counts(db: MockDatabase) -> list:
+    """Mock of the vocab_status_counts view."""
+    counts = defaultdict(int)
+    for row in db.select("vocab_vault", [], None, None):
+        counts[row.get("status")] += 1
+    return [{"status": status, "total": total} for status, total in counts.items()]
+
+def learning_stats(db: MockDatabase, days: int = 30) -> list:
+    """Mock of the get_learning_stats RPC (all activity is bucketed by day)."""
+    stats = defaultdict(lambda: {
+        "user_messages": 0, "assistant_messages": 0, "feedback_count": 0,
+        "corrections": 0, "vocab_added": 0, "vocab_mastered": 0
+    })
+    for row in db.select("chat_logs", [], None, None):
+        stats[row["created_at"][:10]][f"{row['role']}_messages"] += 1
+    for row in db.select("ai_feedback", [], None, None):
+        stats[row["created_at"][:10]]["feedback_count"] += 1
+        stats[row["created_at"][:10]]["corrections"] += not row.get("better_version", "").startswith("Original")
+    for row in db.select("vocab_vault", [], None, None):
+        stats[row["created_at"][:10]]["vocab_added"] += 1
+        stats[row["created_at"][:10]]["vocab_mastered"] += row.get("status") == "mastered"
+    return [{"day": day, **values} for day, values in sorted(stats.items())][-days:]
+
+def learning_summary(db: MockDatabase) -> list:
+    """Mock of the get_learning_summary RPC."""
+    stats = learning_stats(db, days=100_000)
+    feedback = sum(s["feedback_count"] for s in stats)
+    counts = {row["status"]: row["total"] for row in vocab_status_counts(db)}
+    return [{
+        "total_user_messages": sum(s["user_messages"] for s in stats),
+        "active_days": sum(1 for s in stats if s["user_messages"]),
+        "feedback_count": feedback,
+        "correction_rate": round(sum(s["corrections"] for s in stats) / feedback, 3) if feedback else 0,
+        "vocab_active": counts.get("active", 0),
+        "vocab_mastered": counts.get("mastered", 0),
+        "mastered_last_30d": counts.get("mastered", 0),
+        "avg_days_to_master": None,
+    }]
+
+def first_feedback(db: MockDatabase, inputs: list) -> list:
+    """Mock of the get_first_feedback RPC (first row per input by id)."""
+    first = {}
+    for row in sorted(db.select("ai_feedback", [], None, None), key=lambda row: row["id"]):
+        if row.get("user_input") in inputs:
+            first.setdefault(row["user_input"], {
+                "user_input": row["user_input"],
+                "better_version": row.get("better_version"),
+                "grammar_point": row.get("grammar_point"),
+            })
+    return list(first.values())
+
+RPC_FUNCTIONS = {
+    "get_learning_stats": lambda db, params: learning_stats(db, int(params.get("days", 30))),
+    "get_learning_summary": lambda db, params: learning_summary(db),
+    "get_first_feedback": lambda db, params: first_feedback(db, params.get("inputs", [])),
+}
+
+class MockSupabaseHandler(BaseHTTPRequestHandler):
+    """PostgREST-compatible request handler backed by a MockDatabase."""
+
+    db = MockDatabase()
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _parse(self) -> tuple:
+        parts = urlsplit(self.path)
+        table = parts.path.removeprefix("/rest/v1/")
+        filters, order, limit, params = [], None, None, {}
+        for key, value in parse_qsl(parts.query, keep_blank_values=True):
+            if key == "order":
+                order = value
+            elif key == "limit":
+                limit = int(value)
+            elif key in ("select", "on_conflict", "columns"):
+                params[key] = value
+            else:
+                filters.append(parse_filter(key, value))
+        return table, filters, order, limit, params
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length)) if length else None
+
+    def _send(self, payload, status: int = 200):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        table, filters, order, limit, _ = self._parse()
+        if table == "vocab_status_counts":
+            self._send(vocab_status_counts(self.db))
+        else:
+            self._send(self.db.select(table, filters, order, limit))
+
+    def do_POST(self):
+        table, _, _, _, _ = self._parse()
+        body = self._body()
+        if table.startswith("rpc/"):
+            self._send(RPC_FUNCTIONS[table.removeprefix("rpc/")](self.db, body or {}))
+            return
+        rows = body if isinstance(body, list) else [body]
+        upsert = "merge-duplicates" in (self.headers.get("Prefer") or "")
+        self._send(self.db.insert(table, rows, upsert=upsert), status=201)
+
+    def do_PATCH(self):
+        table, filters, _, _, _ = self._parse()
+        self._send(self.db.update(table, filters, self._body() or {}))
+
+    def do_DELETE(self):
+        table, filters, _, _, _ = self._parse()
+        self._send(self.db.delete(table, filters))
+
+# =============================================================================
+# Mock OpenAI-compatible LLM
+# =============================================================================
+REPLIES = [
+    "That sounds great! What did you enjoy most about it?",
+    "Ha, I know exactly what you mean. How did that turn out?",
+    "Interesting! Tell me more about that.",
+]
+
+class MockLLMHandler(BaseHTTPRequestHandler):
+    """OpenAI-compatible /chat/completions handler with a simulated delay."""
+
+    latency = 0.5
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        request = json.loads(self.rfile.read(length))
+        system_prompt = request["messages"][0]["content"]
+        if "English language analyst" in system_prompt:
+            content = json.dumps({
+                "better_version": "Original is great!",
+                "grammar_point": "Excellent use of English!"
+            })
+        else:
+            content = random.choice(REPLIES)
+
+        time.sleep(self.latency * random.uniform(0.8, 1.2))
+        body = json.dumps({
+            "id": "chatcmpl-mock",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "mock"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop"
+            }],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+        }).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+# =============================================================================
+# Entry Point
+# =============================================================================
+def serve(supabase_port: int, llm_port: int, llm_latency: float):
+    """Serve both mock backends until interrupted."""
+    MockLLMHandler.latency = llm_latency
+    servers = [
+        ThreadingHTTPServer(("127.0.0.1", supabase_port), MockSupabaseHandler),
+        ThreadingHTTPServer(("127.0.0.1", llm_port), MockLLMHandler),
+    ]
+    for server in servers:
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for server in servers:
+            server.shutdown()
+
+def main():
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Run mock Supabase and LLM servers.")
+    parser.add_argument("--supabase-port", type=int, default=54321)
+    parser.add_argument("--llm-port", type=int, default=54322)
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="Seconds per completion")
+    args = parser.parse_args()
+    print(f"Mock Supabase: http://127.0.0.1:{args.supabase_port}")
+    print(f"Mock LLM:      http://127.0.0.1:{args.llm_port}/v1")
+    serve(args.supabase_port, args.llm_port, args.llm_latency)
+
+if __name__ == "__main__":
+    main()
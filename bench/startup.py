@@ -0,0 +1,119 @@
+"""
+NativeEcho - Startup Benchmark
+
+Measures what a fresh container pays before the first paint:
+- Import time of the heavy packages (python -X importtime, cold interpreter)
+- Cold script run: time to first element, to first sidebar element
+  ("first paint") and to script end, plus which heavy packages were already
+  imported at first paint
+- Warm rerun time in the same process
+
+Backends point at an unreachable local port, so the numbers measure the app
+itself rather than network latency.
+
+Usage:
+    python bench/startup.py [--repeat 5] [--json bench_output.txt]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "streamlit_app.py")
+HEAVY_MODULES = ["streamlit", "openai", "supabase"]
+
+# Runs in a fresh interpreter; prints one JSON line with timings in seconds
+COLD_RUN_SCRIPT = r"""
+import json, sys, time
+t0 = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+from streamlit.runtime.forward_msg_queue import ForwardMsgQueue
+
+SIDEBAR_ROOT = 1
+marks = {}
+original_enqueue = ForwardMsgQueue.enqueue
+
+def enqueue(self, msg):
+    if msg.WhichOneof("type") == "delta":
+        now = time.perf_counter()
+        marks.setdefault("first_element", now)
+        if msg.metadata.delta_path and msg.metadata.delta_path[0] == SIDEBAR_ROOT and "first_paint" not in marks:
+            marks["first_paint"] = now
+            marks["loaded_at_first_paint"] = [m for m in HEAVY if m in sys.modules]
+    return original_enqueue(self, msg)
+
+ForwardMsgQueue.enqueue = enqueue
+HEAVY = %(heavy)r
+
+at = AppTest.from_file(%(app)r, default_timeout=120)
+at.secrets["supabase"] = {"url": "http://127.0.0.1:9", "key": "benchmark"}
+at.secrets["siliconflow"] = {"api_key": "benchmark", "base_url": "http://127.0.0.1:9/v1", "model": "benchmark"}
+t_ready = time.perf_counter()
+at.run()
+t_done = time.perf_counter()
+at.run()
+t_warm = time.perf_counter()
+
+print(json.dumps({
+    "harness_import": t_ready - t0,
+    "first_element": marks.get("first_element", t_done) - t_ready,
+    "first_paint": marks.get("first_paint", t_done) - t_ready,
+    "script_end": t_done - t_ready,
+    "warm_rerun": t_warm - t_done,
+    "loaded_at_first_paint": marks.get("loaded_at_first_paint", []),
+}))
+"""
+
+def measure_import(module: str) -> float:
+    """Return the cumulative import time of a module in a cold interpreter, in seconds."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, check=True
+    )
+    # Lines look like: "import time:   self [us] | cumulative | imported package"
+    for line in reversed(result.stderr.splitlines()):
+        parts = [p.strip() for p in line.split("|")]
+        if len(parts) == 3 and parts[2] == module:
+            return int(parts[1]) / 1e6
+    raise RuntimeError(f"Could not find import time for {module}")
+
+def measure_cold_run() -> dict:
+    """Run the app once in a fresh interpreter and return its timings."""
+    script = COLD_RUN_SCRIPT % {"app": APP_PATH, "heavy": HEAVY_MODULES[1:]}
+    result = subprocess.run(
+        [sys.executable, "-c", script],
+        capture_output=True, text=True, check=True, cwd=os.path.dirname(APP_PATH)
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def main():
+    """Run the startup benchmark and print a summary."""
+    parser = argparse.ArgumentParser(description="Measure NativeEcho import time and first paint.")
+    parser.add_argument("--repeat", type=int, default=5, help="Cold runs per measurement (median is reported)")
+    parser.add_argument("--json", metavar="PATH", help="Also write raw results to this file")
+    args = parser.parse_args()
+
+    imports = {m: statistics.median(measure_import(m) for _ in range(args.repeat)) for m in HEAVY_MODULES}
+    runs = [measure_cold_run() for _ in range(args.repeat)]
+    timings = {
+        key: statistics.median(run[key] for run in runs)
+        for key in ["harness_import", "first_element", "first_paint", "script_end", "warm_rerun"]
+    }
+
+    print("Import time (cold interpreter, median)")
+    for module, seconds in imports.items():
+        print(f"  {module:<12} {seconds * 1000:8.1f} ms")
+    print(f"\nScript run (median of {args.repeat})")
+    for key, seconds in timings.items():
+        print(f"  {key:<15} {seconds * 1000:8.1f} ms")
+    print(f"\nLoaded at first paint: {', '.join(runs[-1]['loaded_at_first_paint']) or 'none'}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"imports": imports, "timings": timings, "runs": runs}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
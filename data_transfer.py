@@ -0,0 +1,363 @@
+"""
+NativeEcho - Bulk Export / Import
+
+Streams chat_logs, vocab_vault and ai_feedback to JSONL or Parquet files and
+loads them back with idempotent upserts. Memory use stays constant: rows are
+read with keyset pagination on `id` and written page by page, and imports are
+sent in fixed-size chunks.
+
+Both directions are resumable. Progress is checkpointed in `_state.json` inside
+the backup directory, so re-running the same command after an interruption
+continues where it stopped (use --restart to start over).
+
+Usage:
+    python data_transfer.py export backup/ [--format parquet] [--tables chat_logs]
+    python data_transfer.py import backup/ [--format parquet] [--chunk-size 500]
+
+Credentials are read from --url/--key, the SUPABASE_URL/SUPABASE_KEY
+environment variables, or `.streamlit/secrets.toml`.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+TABLES = ["chat_logs", "vocab_vault", "ai_feedback"]
+STATE_FILE = "_state.json"
+SECRETS_PATH = Path(".streamlit/secrets.toml")
+
+# Rows per Parquet part file; a part is only checkpointed once it is closed
+PARQUET_ROWS_PER_PART = 100_000
+# Pages are buffered into row groups of this size for compression and scan speed
+PARQUET_ROWS_PER_GROUP = 65_536
+
+# Parquet column types for known columns (see Database Schema in README.md).
+# The schema itself comes from the exported rows; columns not listed here are
+# inferred, `*_at` columns are stored as timestamps.
+PARQUET_TYPE_HINTS = {
+    "id": "int64",
+    "usage_count": "int32",
+    "is_reviewed": "bool",
+}
+
+# =============================================================================
+# Configuration
+# =============================================================================
+def load_credentials(url: str | None, key: str | None) -> tuple[str, str]:
+    """Resolve Supabase credentials from arguments, environment or secrets.toml."""
+    url = url or os.environ.get("SUPABASE_URL")
+    key = key or os.environ.get("SUPABASE_KEY")
+    if (not url or not key) and SECRETS_PATH.exists():
+        import tomllib
+        with SECRETS_PATH.open("rb") as f:
+            section = tomllib.load(f).get("supabase", {})
+        url = url or section.get("url")
+        key = key or section.get("key")
+    if not url or not key:
+        sys.exit("Missing Supabase credentials: pass --url/--key, set SUPABASE_URL/SUPABASE_KEY or configure .streamlit/secrets.toml")
+    return url, key
+
+def require_pyarrow():
+    """Import pyarrow, exiting with an install hint if it is missing."""
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        sys.exit("Parquet support needs pyarrow: pip install pyarrow (or use --format jsonl)")
+    return pyarrow, pyarrow.parquet
+
+def create_supabase(url: str, key: str):
+    """Create a Supabase client."""
+    from supabase import create_client
+    return create_client(url, key)
+
+# =============================================================================
+# Checkpoint State
+# =============================================================================
+def load_state(directory: Path) -> dict:
+    """Load the checkpoint file, or an empty state if there is none."""
+    path = directory / STATE_FILE
+    if not path.exists():
+        return {"export": {}, "import": {}}
+    return json.loads(path.read_text())
+
+def save_state(directory: Path, state: dict):
+    """Atomically write the checkpoint file."""
+    path = directory / STATE_FILE
+    tmp_path = path.with_suffix(".tmp")
+    tmp_path.write_text(json.dumps(state, indent=2))
+    os.replace(tmp_path, path)
+
+# =============================================================================
+# Reading / Writing Rows
+# =============================================================================
+def with_retries(operation, attempts: int = 5):
+    """Run a network operation, retrying transient failures with backoff."""
+    for attempt in range(attempts):
+        try:
+            return operation()
+        except Exception as e:
+            if attempt == attempts - 1:
+                raise
+            delay = 2 ** attempt
+            print(f"  retrying in {delay}s after error: {e}", file=sys.stderr)
+            time.sleep(delay)
+
+def iter_pages(supabase, table: str, after_id: int, page_size: int):
+    """Yield pages of rows ordered by id, starting after `after_id` (keyset pagination).
+    
+    Stops only on an empty page: the server may cap pages below `page_size`
+    (PostgREST max-rows), so a short page doesn't mean the table is done.
+    """
+    while True:
+        response = with_retries(lambda: supabase.table(table)
+            .select("*")
+            .gt("id", after_id)
+            .order("id")
+            .limit(page_size)
+            .execute())
+        rows = response.data or []
+        if not rows:
+            return
+        yield rows
+        after_id = rows[-1]["id"]
+
+def infer_parquet_schema(rows: list):
+    """Build a pyarrow schema from the columns of the first exported page."""
+    pa, _ = require_pyarrow()
+    types = {
+        "int32": pa.int32(),
+        "int64": pa.int64(),
+        "bool": pa.bool_(),
+    }
+    fields = []
+    for name in dict.fromkeys(key for row in rows for key in row):
+        if name in PARQUET_TYPE_HINTS:
+            field_type = types[PARQUET_TYPE_HINTS[name]]
+        elif name.endswith("_at"):
+            field_type = pa.timestamp("us", tz="UTC")
+        else:
+            values = [row[name] for row in rows if row.get(name) is not None]
+            # All-null columns fall back to string
+            field_type = pa.array(values).type if values else pa.string()
+        fields.append((name, field_type))
+    return pa.schema(fields)
+
+def rows_to_record_batch(rows: list, schema):
+    """Convert API rows to a record batch, parsing ISO timestamps.
+    
+    Raises ValueError for columns missing from the schema or values that don't
+    fit it, rather than silently dropping data.
+    """
+    pa, _ = require_pyarrow()
+    unknown = {key for row in rows for key in row} - set(schema.names)
+    if unknown:
+        raise ValueError(f"Columns not in the Parquet schema: {', '.join(sorted(unknown))}; export with --format jsonl or --restart")
+    columns = []
+    for field in schema:
+        values = [row.get(field.name) for row in rows]
+        if pa.types.is_timestamp(field.type):
+            values = [datetime.fromisoformat(v) if v else None for v in values]
+        try:
+            columns.append(pa.array(values, type=field.type))
+        except (pa.ArrowInvalid, pa.ArrowTypeError) as e:
+            raise ValueError(f"Column {field.name} doesn't fit Parquet type {field.type}: {e}; export with --format jsonl") from e
+    return pa.RecordBatch.from_arrays(columns, schema=schema)
+
+def to_json_value(value):
+    """Make a Parquet value JSON-serializable for the API."""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+# =============================================================================
+# Export
+# =============================================================================
+def export_jsonl(supabase, table: str, directory: Path, state: dict, page_size: int):
+    """Stream a table into <table>.jsonl, appending after the last checkpoint."""
+    progress = state["export"].setdefault("jsonl", {}).setdefault(table, {"last_id": 0, "rows": 0, "offset": 0})
+    path = directory / f"{table}.jsonl"
+    path.touch()
+
+    with path.open("r+b") as f:
+        # Drop anything written after the last checkpoint (e.g. a half-written page)
+        f.truncate(progress["offset"])
+        f.seek(progress["offset"])
+        for rows in iter_pages(supabase, table, progress["last_id"], page_size):
+            f.write("".join(json.dumps(row, ensure_ascii=False) + "\n" for row in rows).encode("utf-8"))
+            f.flush()
+            os.fsync(f.fileno())
+            progress.update(last_id=rows[-1]["id"], rows=progress["rows"] + len(rows), offset=f.tell())
+            save_state(directory, state)
+            print(f"  {table}: {progress['rows']} rows", file=sys.stderr)
+
+def export_parquet(supabase, table: str, directory: Path, state: dict, page_size: int):
+    """Stream a table into <table>/part-NNNNN.parquet files."""
+    pa, pq = require_pyarrow()
+    progress = state["export"].setdefault("parquet", {}).setdefault(table, {"last_id": 0, "rows": 0, "part": 0})
+    table_dir = directory / table
+    table_dir.mkdir(exist_ok=True)
+    if progress["part"] == 0:
+        for stale in table_dir.glob("part-*.parquet"):
+            stale.unlink()
+        schema = None
+    else:
+        # Resumed parts must match the ones already written
+        schema = pq.read_schema(table_dir / "part-00000.parquet")
+
+    writer = None
+    pending = []
+    part_rows = 0
+    last_id = progress["last_id"]
+
+    def write_row_groups(final: bool = False):
+        """Write buffered pages as full row groups (and the remainder if final)."""
+        nonlocal pending
+        buffered = pa.Table.from_batches(pending, schema=schema)
+        while buffered.num_rows >= PARQUET_ROWS_PER_GROUP or (final and buffered.num_rows):
+            writer.write_table(buffered.slice(0, PARQUET_ROWS_PER_GROUP), row_group_size=PARQUET_ROWS_PER_GROUP)
+            buffered = buffered.slice(PARQUET_ROWS_PER_GROUP)
+        pending = buffered.to_batches()
+
+    def close_part():
+        nonlocal writer, part_rows
+        write_row_groups(final=True)
+        writer.close()
+        progress.update(last_id=last_id, rows=progress["rows"] + part_rows, part=progress["part"] + 1)
+        save_state(directory, state)
+        print(f"  {table}: {progress['rows']} rows", file=sys.stderr)
+        writer, part_rows = None, 0
+
+    for rows in iter_pages(supabase, table, progress["last_id"], page_size):
+        if schema is None:
+            schema = infer_parquet_schema(rows)
+        if writer is None:
+            # An unfinished part from an interrupted run is simply overwritten
+            writer = pq.ParquetWriter(table_dir / f"part-{progress['part']:05d}.parquet", schema)
+        pending.append(rows_to_record_batch(rows, schema))
+        part_rows += len(rows)
+        last_id = rows[-1]["id"]
+        if part_rows >= PARQUET_ROWS_PER_PART:
+            close_part()
+        elif sum(batch.num_rows for batch in pending) >= PARQUET_ROWS_PER_GROUP:
+            write_row_groups()
+
+    if writer is not None:
+        close_part()
+
+def run_export(args):
+    """Export the selected tables."""
+    directory = Path(args.directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    state = load_state(directory)
+    if args.restart:
+        state["export"].pop(args.format, None)
+    supabase = create_supabase(*load_credentials(args.url, args.key))
+
+    for table in args.tables:
+        print(f"Exporting {table}...", file=sys.stderr)
+        if args.format == "parquet":
+            export_parquet(supabase, table, directory, state, args.page_size)
+        else:
+            export_jsonl(supabase, table, directory, state, args.page_size)
+        print(f"Exported {state['export'][args.format][table]['rows']} rows from {table}", file=sys.stderr)
+
+# =============================================================================
+# Import
+# =============================================================================
+def iter_jsonl_chunks(directory: Path, table: str, skip: int, chunk_size: int):
+    """Yield chunks of rows from <table>.jsonl, skipping already imported rows."""
+    path = directory / f"{table}.jsonl"
+    if not path.exists():
+        return
+    chunk = []
+    with path.open(encoding="utf-8") as f:
+        for line_number, line in enumerate(f):
+            if line_number < skip or not line.strip():
+                continue
+            chunk.append(json.loads(line))
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+    if chunk:
+        yield chunk
+
+def iter_parquet_chunks(directory: Path, table: str, skip: int, chunk_size: int):
+    """Yield chunks of rows from <table>/part-*.parquet, skipping already imported rows."""
+    _, pq = require_pyarrow()
+    for path in sorted((directory / table).glob("part-*.parquet")):
+        parquet_file = pq.ParquetFile(path)
+        # Whole parts that were already imported are skipped using metadata only
+        if skip >= parquet_file.metadata.num_rows:
+            skip -= parquet_file.metadata.num_rows
+            continue
+        for batch in parquet_file.iter_batches(batch_size=chunk_size):
+            rows = batch.to_pylist()
+            if skip:
+                rows, skip = rows[skip:], max(0, skip - len(rows))
+            if rows:
+                yield [{k: to_json_value(v) for k, v in row.items()} for row in rows]
+
+def run_import(args):
+    """Import the selected tables with idempotent upserts on id."""
+    directory = Path(args.directory)
+    state = load_state(directory)
+    if args.restart:
+        state["import"].pop(args.format, None)
+    supabase = create_supabase(*load_credentials(args.url, args.key))
+    iter_chunks = iter_parquet_chunks if args.format == "parquet" else iter_jsonl_chunks
+
+    for table in args.tables:
+        progress = state["import"].setdefault(args.format, {}).setdefault(table, {"rows": 0})
+        print(f"Importing {table}...", file=sys.stderr)
+        for rows in iter_chunks(directory, table, progress["rows"], args.chunk_size):
+            with_retries(lambda: supabase.table(table).upsert(rows, on_conflict="id").execute())
+            progress["rows"] += len(rows)
+            save_state(directory, state)
+            print(f"  {table}: {progress['rows']} rows", file=sys.stderr)
+        print(f"Imported {progress['rows']} rows into {table}", file=sys.stderr)
+
+    print(
+        "\nIf rows were imported into a fresh project, advance the id sequences so new inserts don't collide:\n"
+        + "\n".join(
+            f"  select setval(pg_get_serial_sequence('public.{t}', 'id'), (select max(id) from public.{t}));"
+            for t in args.tables
+        )
+        + "\n\nThen rebuild the Progress rollup so imported history is counted:\n"
+        + "  select public.refresh_learning_stats(full_rebuild => true);",
+        file=sys.stderr
+    )
+
+# =============================================================================
+# CLI
+# =============================================================================
+def main(argv: list | None = None):
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Bulk export/import NativeEcho data.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    for name, help_text in [("export", "Stream tables to files"), ("import", "Upsert tables from files")]:
+        sub = subparsers.add_parser(name, help=help_text)
+        sub.add_argument("directory", help="Backup directory")
+        sub.add_argument("--format", choices=["jsonl", "parquet"], default="jsonl")
+        sub.add_argument("--tables", nargs="+", choices=TABLES, default=TABLES)
+        sub.add_argument("--url", help="Supabase URL")
+        sub.add_argument("--key", help="Supabase key")
+        sub.add_argument("--restart", action="store_true", help="Ignore the checkpoint and start over")
+        if name == "export":
+            sub.add_argument("--page-size", type=int, default=1000, help="Rows per API request")
+        else:
+            sub.add_argument("--chunk-size", type=int, default=500, help="Rows per upsert")
+
+    args = parser.parse_args(argv)
+    if args.command == "export":
+        run_export(args)
+    else:
+        run_import(args)
+
+if __name__ == "__main__":
+    main()
@@ -8,12 +8,24 @@ A personal AI English coach with:
 - SiliconFlow LLM API integration
 """
 
+from __future__ import annotations
+
 import streamlit as st
+import os
 import random
 import json
+import re
+import time
+import hashlib
+import threading
+from collections import OrderedDict, defaultdict, deque
 from concurrent.futures import ThreadPoolExecutor
-from openai import OpenAI
-from supabase import create_client, Client
+from typing import TYPE_CHECKING
+
+# Heavy clients are imported lazily inside the cached factories below
+if TYPE_CHECKING:
+    from openai import OpenAI
+    from supabase import Client
 
 # =============================================================================
 # Page Configuration
@@ -28,218 +40,15 @@ st.set_page_config(
 # =============================================================================
 # Custom CSS - Compact UI, hide avatars, style chat bubbles
 # =============================================================================
-st.markdown("""
-<style>
-/* ============ COMPACT GLOBAL STYLES ============ */
-/* Reduce main container padding */
-.stMainBlockContainer {
-    padding-top: 1rem !important;
-    padding-bottom: 0 !important;
-}
-
-/* Compact title */
-h1 {
-    font-size: 1.5rem !important;
-    margin-bottom: 0.25rem !important;
-}
-
-/* Smaller caption */
-.stCaption {
-    font-size: 0.75rem !important;
-    margin-bottom: 0.5rem !important;
-}
-
-/* Reduce block spacing */
-.stElementContainer {
-    margin-bottom: 0.25rem !important;
-}
-
-/* Compact buttons */
-.stButton > button {
-    padding: 0.25rem 0.75rem !important;
-    font-size: 0.85rem !important;
-}
+STYLESHEET_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets", "style.html")
 
-/* Compact text inputs */
-.stTextInput > div > div > input {
-    padding: 0.4rem 0.6rem !important;
-    font-size: 0.85rem !important;
-}
-
-/* Compact text area */
-.stTextArea > div > div > textarea {
-    font-size: 0.85rem !important;
-}
-
-/* Reduce expander padding */
-.streamlit-expanderHeader {
-    padding: 0.4rem 0.6rem !important;
-    font-size: 0.85rem !important;
-}
-
-.streamlit-expanderContent {
-    padding: 0.5rem !important;
-}
-
-/* ============ SIDEBAR COMPACT ============ */
-section[data-testid="stSidebar"] {
-    width: 280px !important;
-}
-
-section[data-testid="stSidebar"] .stElementContainer {
-    margin-bottom: 0.2rem !important;
-}
+@st.cache_resource(show_spinner=False)
+def load_stylesheet() -> str:
+    """Read the stylesheet once per process; it is re-injected on every run."""
+    with open(STYLESHEET_PATH, encoding="utf-8") as f:
+        return f.read()
 
-section[data-testid="stSidebar"] h1 {
-    font-size: 1.2rem !important;
-}
-
-section[data-testid="stSidebar"] h2, 
-section[data-testid="stSidebar"] h3,
-section[data-testid="stSidebar"] .stSubheader {
-    font-size: 0.9rem !important;
-    margin-top: 0.5rem !important;
-    margin-bottom: 0.25rem !important;
-}
-
-section[data-testid="stSidebar"] hr {
-    margin: 0.5rem 0 !important;
-}
-
-/* ============ CHAT MESSAGE STYLES ============ */
-/* Hide ALL chat message avatars - multiple selectors for compatibility */
-[data-testid="stChatMessageAvatarContainer"],
-.stChatMessage > div:first-child:has(img),
-.stChatMessage > div:first-child:has(svg),
-.stChatMessage [data-testid="chatAvatarIcon-user"],
-.stChatMessage [data-testid="chatAvatarIcon-assistant"],
-.stChatMessage img[alt="user"],
-.stChatMessage img[alt="assistant"],
-.stChatMessage .stAvatar,
-div[data-testid="stChatMessage"] > div:first-child {
-    display: none !important;
-    width: 0 !important;
-    height: 0 !important;
-    overflow: hidden !important;
-}
-
-/* Compact chat messages */
-.stChatMessage {
-    padding: 0.5rem 0.75rem !important;
-    margin-bottom: 0.4rem !important;
-    gap: 0 !important;
-    flex-direction: column !important;
-}
-
-[data-testid="stChatMessageContent"] {
-    margin-left: 0 !important;
-    max-width: 100% !important;
-}
-
-[data-testid="stChatMessageContent"] p {
-    font-size: 0.9rem !important;
-    margin-bottom: 0.25rem !important;
-}
-
-/* User message bubble */
-div[data-testid="stChatMessage"]:has(img[alt="user"]),
-div[data-testid="stChatMessage"]:has([data-testid="chatAvatarIcon-user"]) {
-    background: linear-gradient(135deg, #667eea 0%, #764ba2 100%) !important;
-    border-radius: 12px 12px 2px 12px !important;
-    margin-left: 15% !important;
-}
-
-div[data-testid="stChatMessage"]:has(img[alt="user"]) p,
-div[data-testid="stChatMessage"]:has([data-testid="chatAvatarIcon-user"]) p {
-    color: white !important;
-}
-
-/* Assistant message bubble */
-div[data-testid="stChatMessage"]:has(img[alt="assistant"]),
-div[data-testid="stChatMessage"]:has([data-testid="chatAvatarIcon-assistant"]) {
-    background: #f0f2f6 !important;
-    border-radius: 12px 12px 12px 2px !important;
-    margin-right: 15% !important;
-}
-
-/* Compact feedback expander inside chat */
-.stChatMessage .streamlit-expanderHeader {
-    padding: 0.2rem 0.5rem !important;
-    font-size: 0.75rem !important;
-}
-
-.stChatMessage .streamlit-expanderContent {
-    padding: 0.3rem 0.5rem !important;
-    font-size: 0.8rem !important;
-}
-
-/* ============ ADD BUTTON (POPOVER) ============ */
-/* Square button style */
-[data-testid="stPopover"] > button {
-    border-radius: 6px !important;
-    min-width: 32px !important;
-    width: 32px !important;
-    height: 32px !important;
-    padding: 0 !important;
-    font-size: 1rem !important;
-    line-height: 1 !important;
-}
-
-/* Popover content - wider and compact */
-[data-testid="stPopoverBody"] {
-    min-width: 320px !important;
-    padding: 0.4rem !important;
-}
-
-[data-testid="stPopoverBody"] .stTextInput {
-    margin-bottom: 0 !important;
-}
-
-[data-testid="stPopoverBody"] .stTextInput input {
-    padding: 0.3rem 0.5rem !important;
-    font-size: 0.85rem !important;
-}
-
-[data-testid="stPopoverBody"] .stButton button {
-    padding: 0.3rem 0.6rem !important;
-    font-size: 0.8rem !important;
-    height: auto !important;
-}
-
-[data-testid="stPopoverBody"] .stElementContainer {
-    margin-bottom: 0 !important;
-}
-
-/* ============ CHAT INPUT ============ */
-[data-testid="stChatInput"] {
-    padding: 0.5rem 0 !important;
-}
-
-[data-testid="stChatInput"] textarea {
-    font-size: 0.9rem !important;
-}
-
-/* Prevent password autofill styling on vocab input */
-[data-testid="stPopoverBody"] input {
-    -webkit-text-security: none !important;
-}
-
-</style>
-
-<script>
-// Disable autocomplete on vocab input to prevent browser password detection
-(function() {
-    const observer = new MutationObserver(function(mutations) {
-        document.querySelectorAll('[data-testid="stPopoverBody"] input').forEach(function(input) {
-            input.setAttribute('autocomplete', 'off');
-            input.setAttribute('data-form-type', 'other');
-            input.setAttribute('data-lpignore', 'true');
-        });
-    });
-    observer.observe(document.body, { childList: true, subtree: true });
-})();
-</script>
-""", unsafe_allow_html=True)
+st.markdown(load_stylesheet(), unsafe_allow_html=True)
 
 # =============================================================================
 # Default Configuration Values
@@ -252,6 +61,28 @@ DEFAULT_CONFIG = {
     "siliconflow_model": "deepseek-ai/DeepSeek-V3.2"
 }
 
+# OpenAI-compatible LLM endpoints. SiliconFlow is filled in from the
+# [siliconflow] config above; add or override providers with
+# [providers.<name>] sections in secrets.toml. The local servers are
+# selectable, but only preselected as fallbacks once configured in secrets,
+# since they don't exist on hosted deployments.
+DEFAULT_PROVIDERS = {
+    "siliconflow": {"configured": True},
+    "ollama": {
+        "base_url": "http://localhost:11434/v1",
+        "api_key": "ollama",
+        "chat_model": "qwen2.5:7b",
+        "polisher_model": "qwen2.5:7b"
+    },
+    "llama.cpp": {
+        "base_url": "http://localhost:8080/v1",
+        "api_key": "llama.cpp",
+        "chat_model": "default",
+        "polisher_model": "default"
+    }
+}
+REQUIRED_PROVIDER_KEYS = ["base_url", "chat_model", "polisher_model"]
+
 # =============================================================================
 # Configuration Helper Functions
 # =============================================================================
@@ -272,6 +103,38 @@ def get_config_value(section: str, key: str, default: str = "") -> str:
     default_key = f"{section}_{key}"
     return DEFAULT_CONFIG.get(default_key, default)
 
+def get_provider_configs() -> dict:
+    """Get all LLM provider configs, merging built-ins with [providers.<name>] secrets.
+    
+    Providers from secrets are marked as configured; ones missing a required
+    key are skipped with a warning.
+    """
+    providers = {name: dict(config) for name, config in DEFAULT_PROVIDERS.items()}
+    providers["siliconflow"].update(
+        base_url=get_config_value("siliconflow", "base_url"),
+        api_key=get_config_value("siliconflow", "api_key"),
+        chat_model=get_config_value("siliconflow", "model"),
+        polisher_model=get_config_value("siliconflow", "model")
+    )
+    
+    try:
+        for name, config in st.secrets["providers"].items():
+            config = dict(config)
+            # A single `model` applies to both tasks unless overridden
+            if "model" in config:
+                config.setdefault("chat_model", config["model"])
+                config.setdefault("polisher_model", config.pop("model"))
+            merged = {**providers.get(name, {}), **config, "configured": True}
+            missing = [key for key in REQUIRED_PROVIDER_KEYS if not merged.get(key)]
+            if missing:
+                providers.pop(name, None)
+                st.warning(f"Skipping provider '{name}': missing {', '.join(missing)} in [providers.{name}]")
+                continue
+            providers[name] = merged
+    except (KeyError, FileNotFoundError):
+        pass
+    return providers
+
 def has_valid_config() -> bool:
     """Check if we have valid configuration - always True since we have DEFAULT_CONFIG."""
     # We have embedded defaults, so always return True
@@ -350,14 +213,21 @@ model = "{DEFAULT_CONFIG["siliconflow_model"]}"
 # =============================================================================
 # Initialize Clients
 # =============================================================================
+@st.cache_resource(show_spinner=False)
+def get_supabase_client(url: str, key: str) -> Client:
+    """Create a Supabase client, shared across sessions per credentials."""
+    from supabase import create_client
+    return create_client(url, key)
+
 def init_supabase() -> Client:
     """Initialize Supabase client from config."""
     url = get_config_value("supabase", "url")
     key = get_config_value("supabase", "key")
-    return create_client(url, key)
+    return get_supabase_client(url, key)
 
 def get_openai_client(api_key: str, base_url: str) -> OpenAI:
-    """Create OpenAI-compatible client for SiliconFlow."""
+    """Create an OpenAI-compatible client."""
+    from openai import OpenAI
     return OpenAI(api_key=api_key, base_url=base_url)
 
 # =============================================================================
@@ -377,15 +247,15 @@ def fetch_chat_history(supabase: Client, limit: int = 20) -> list:
         st.error(f"Error fetching chat history: {e}")
         return []
 
-def save_chat_message(supabase: Client, role: str, content: str):
-    """Save a message to chat_logs."""
+def save_chat_message(supabase: Client, role: str, content: str) -> dict:
+    """Save a message to chat_logs and return it (with its id when saved)."""
+    message = {"role": role, "content": content}
     try:
-        supabase.table("chat_logs").insert({
-            "role": role,
-            "content": content
-        }).execute()
+        response = supabase.table("chat_logs").insert(message).execute()
+        return response.data[0] if response.data else message
     except Exception as e:
         st.error(f"Error saving message: {e}")
+        return message
 
 def fetch_active_vocab(supabase: Client) -> list:
     """Fetch active vocabulary from vocab_vault."""
@@ -422,17 +292,35 @@ def update_vocab_usage(supabase: Client, phrase_id: int, new_count: int):
     except Exception as e:
         st.error(f"Error updating vocabulary usage: {e}")
 
-def fetch_feedback_for_input(supabase: Client, user_input: str) -> dict | None:
-    """Fetch AI feedback for a specific user input."""
+def fetch_feedback_for_inputs(supabase: Client, user_inputs: list) -> dict | None:
+    """Fetch the first AI feedback per user input, keyed by the input text.
+    
+    Uses the get_first_feedback RPC, which dedupes in Postgres so an input
+    repeated many times can't push others past the max-rows cap. Falls back to
+    one limit(1) query per input if the migration isn't applied. Returns None
+    if the lookup failed (so callers can retry instead of caching the misses).
+    """
+    inputs = list(dict.fromkeys(user_inputs))
     try:
-        response = supabase.table("ai_feedback") \
-            .select("*") \
-            .eq("user_input", user_input) \
-            .limit(1) \
-            .execute()
-        return response.data[0] if response.data else None
+        response = supabase.rpc("get_first_feedback", {"inputs": inputs}).execute()
+        return {row["user_input"]: row for row in response.data or []}
+    except Exception:
+        pass
+    
+    feedback = {}
+    try:
+        for user_input in inputs:
+            response = supabase.table("ai_feedback") \
+                .select("user_input, better_version, grammar_point") \
+                .eq("user_input", user_input) \
+                .order("id") \
+                .limit(1) \
+                .execute()
+            if response.data:
+                feedback[user_input] = response.data[0]
     except Exception:
         return None
+    return feedback
 
 def save_ai_feedback(supabase: Client, user_input: str, better_version: str, grammar_point: str):
     """Save AI feedback analysis."""
@@ -446,11 +334,12 @@ def save_ai_feedback(supabase: Client, user_input: str, better_version: str, gra
     except Exception as e:
         st.error(f"Error saving feedback: {e}")
 
-def fetch_all_vocab(supabase: Client) -> list:
-    """Fetch all vocabulary items."""
+def fetch_vocab_by_status(supabase: Client, status: str) -> list:
+    """Fetch vocabulary items with the given status, newest first."""
     try:
         response = supabase.table("vocab_vault") \
             .select("*") \
+            .eq("status", status) \
             .order("created_at", desc=True) \
             .execute()
         return response.data if response.data else []
@@ -458,6 +347,17 @@ def fetch_all_vocab(supabase: Client) -> list:
         st.error(f"Error fetching vocabulary: {e}")
         return []
 
+def fetch_vocab_counts(supabase: Client) -> dict | None:
+    """Fetch vocabulary counts per status from the vocab_status_counts view.
+    
+    Returns None if the view is unavailable (e.g. the migration isn't applied).
+    """
+    try:
+        response = supabase.table("vocab_status_counts").select("*").execute()
+        return {row["status"]: row["total"] for row in response.data or []}
+    except Exception:
+        return None
+
 def mark_vocab_mastered(supabase: Client, vocab_id: int):
     """Mark a vocabulary item as mastered."""
     try:
@@ -474,9 +374,254 @@ def delete_vocab(supabase: Client, vocab_id: int):
     except Exception as e:
         st.error(f"Error deleting vocabulary: {e}")
 
+# =============================================================================
+# Analytics (server-side aggregates, see supabase/migrations)
+# =============================================================================
+def fetch_learning_summary(supabase: Client) -> dict:
+    """Fetch headline learning numbers via the get_learning_summary RPC."""
+    try:
+        response = supabase.rpc("get_learning_summary").execute()
+        return response.data[0] if response.data else {}
+    except Exception as e:
+        st.error(f"Error fetching learning summary: {e}")
+        return {}
+
+def fetch_learning_stats(supabase: Client, days: int = 30) -> list:
+    """Fetch the daily learning time series via the get_learning_stats RPC."""
+    try:
+        response = supabase.rpc("get_learning_stats", {"days": days}).execute()
+        return response.data if response.data else []
+    except Exception as e:
+        st.error(f"Error fetching learning stats: {e}")
+        return []
+
+# =============================================================================
+# LLM Provider Routing
+# =============================================================================
+class ProviderRouter:
+    """Routes LLM calls across OpenAI-compatible endpoints with failover.
+    
+    Latency and errors are tracked per endpoint and task over a rolling time
+    window. An endpoint is degraded when its error rate reaches the limit or
+    its p95 latency exceeds the task's p95 target; healthy endpoints are tried first in the configured
+    order, degraded ones last by p95. Old samples age out of the window, so a
+    degraded endpoint gets traffic again once it has been left alone. Each
+    attempt times out at the task's latency budget (or the endpoint's
+    `timeout`, if lower). The p95 targets sit well below the budgets, so a
+    slow but still answering endpoint is demoted before calls time out.
+    """
+
+    def __init__(self, window_seconds: float = 300, min_samples: int = 3,
+                 max_error_rate: float = 0.5, latency_budgets: dict | None = None,
+                 p95_targets: dict | None = None):
+        self.window_seconds = window_seconds
+        self.min_samples = min_samples
+        self.max_error_rate = max_error_rate
+        self.latency_budgets = latency_budgets or {"chat": 20.0, "polisher": 10.0}
+        self.p95_targets = p95_targets or {"chat": 8.0, "polisher": 4.0}
+        self.samples = defaultdict(deque)
+        self.clients = {}
+        self.lock = threading.Lock()
+
+    def _client(self, endpoint: dict) -> OpenAI:
+        """Get a pooled client for an endpoint."""
+        key = (endpoint.get("api_key", ""), endpoint["base_url"])
+        with self.lock:
+            if key not in self.clients:
+                self.clients[key] = get_openai_client(*key)
+            return self.clients[key]
+
+    @staticmethod
+    def endpoint_id(endpoint: dict) -> str:
+        """Identify an endpoint by name and URL, so edited URLs start fresh."""
+        return f"{endpoint['name']}@{endpoint['base_url']}"
+
+    def record(self, endpoint: dict, task: str, latency: float, ok: bool):
+        """Record the outcome of one call."""
+        with self.lock:
+            self.samples[(self.endpoint_id(endpoint), task)].append((time.time(), latency, ok))
+
+    def health(self, endpoint: dict, task: str) -> dict:
+        """Return p95 latency, error rate and degraded flag for an endpoint."""
+        with self.lock:
+            samples = self.samples[(self.endpoint_id(endpoint), task)]
+            cutoff = time.time() - self.window_seconds
+            while samples and samples[0][0] < cutoff:
+                samples.popleft()
+            latencies = sorted(latency for _, latency, _ in samples)
+            errors = sum(1 for _, _, ok in samples if not ok)
+        
+        count = len(latencies)
+        p95 = latencies[min(count - 1, int(0.95 * count))] if count else 0.0
+        error_rate = errors / count if count else 0.0
+        degraded = count >= self.min_samples and (
+            error_rate >= self.max_error_rate or p95 > self.p95_targets.get(task, 8.0)
+        )
+        return {"samples": count, "p95": p95, "error_rate": error_rate, "degraded": degraded}
+
+    def order(self, endpoints: list, task: str) -> list:
+        """Order endpoints for a call: healthy ones as configured, then degraded ones by p95."""
+        health = {e["name"]: self.health(e, task) for e in endpoints}
+        healthy = [e for e in endpoints if not health[e["name"]]["degraded"]]
+        degraded = sorted(
+            (e for e in endpoints if health[e["name"]]["degraded"]),
+            key=lambda e: health[e["name"]]["p95"]
+        )
+        return healthy + degraded
+
+    def complete(self, endpoints: list, task: str, messages: list,
+                 temperature: float, max_tokens: int) -> tuple:
+        """Run a chat completion, failing over between endpoints. Raises if all fail.
+        
+        Returns the reply and the endpoint that produced it.
+        """
+        errors = []
+        budget = self.latency_budgets.get(task, 20.0)
+        ordered = self.order(endpoints, task)
+        for i, endpoint in enumerate(ordered):
+            start = time.perf_counter()
+            try:
+                # Fail over instead of retrying, except on the last endpoint
+                client = self._client(endpoint).with_options(
+                    timeout=min(endpoint.get("timeout", budget), budget),
+                    max_retries=1 if i == len(ordered) - 1 else 0
+                )
+                response = client.chat.completions.create(
+                    model=endpoint[f"{task}_model"],
+                    messages=messages,
+                    temperature=temperature,
+                    max_tokens=max_tokens
+                )
+                content = response.choices[0].message.content
+            except Exception as e:
+                self.record(endpoint, task, time.perf_counter() - start, False)
+                errors.append(f"{endpoint['name']}: {e}")
+                continue
+            self.record(endpoint, task, time.perf_counter() - start, True)
+            return content, endpoint
+        raise RuntimeError("; ".join(errors) or "No LLM provider configured")
+
+@st.cache_resource(show_spinner=False)
+def get_provider_router() -> ProviderRouter:
+    """Process-wide router, so endpoint health is shared by all sessions."""
+    return ProviderRouter()
+
+# =============================================================================
+# Response Cache (opt-in, short-context turns only)
+# =============================================================================
+# First-turn openers eligible for cached replies (matched after normalization)
+SMALL_TALK_OPENERS = [
+    "hi", "hello", "hey", "hi there", "hello there", "hey there",
+    "good morning", "good afternoon", "good evening",
+    "how are you", "how are you today", "how are you doing", "how's it going",
+    "hi how are you", "hi how are you today", "hello how are you", "hello how are you today",
+    "hey how are you", "hey how's it going", "what's up", "hey what's up",
+]
+
+class ResponseCache:
+    """LRU + TTL cache of chat replies for first-turn small talk.
+
+    Only the first user message of a session is cached, and only if it exactly
+    matches a known opener (after normalization), so a reply can never be
+    reused for a message that merely looks similar. History loaded from the
+    database before that message is not part of the key. Entries are
+    bucketed by model and system prompt hash, so replies are only reused for
+    the same persona. Cached replies are only served once `min_variants` real
+    replies were collected for an entry, and then a random distinct variant is
+    picked so greetings don't feel canned.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl_seconds: float = 3600,
+                 min_variants: int = 3, max_variants: int = 5,
+                 openers: list = SMALL_TALK_OPENERS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.min_variants = min_variants
+        self.max_variants = max_variants
+        self.openers = {self.normalize(opener) for opener in openers}
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+        self.avg_latency = 0.0
+        self.fills = 0
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        """Lowercase, drop punctuation and collapse whitespace."""
+        return " ".join(re.sub(r"[^\w\s]", " ", text.lower()).split())
+
+    def make_key(self, model: str, system_prompt: str, messages: list) -> tuple | None:
+        """Build a cache key, or None unless this is a first-turn small talk opener.
+        
+        `messages` are the ones sent in this session, without loaded history.
+        """
+        if len(messages) != 1 or messages[0]["role"] != "user":
+            return None
+        text = self.normalize(messages[0]["content"])
+        if text not in self.openers:
+            return None
+        return model, hashlib.sha256(system_prompt.encode("utf-8")).hexdigest(), text
+
+    def _live(self, key: tuple) -> dict | None:
+        """Return the entry for a key, dropping it if expired (lock held)."""
+        entry = self.entries.get(key)
+        if entry and time.time() - entry["created_at"] > self.ttl_seconds:
+            del self.entries[key]
+            return None
+        return entry
+
+    def get(self, key: tuple) -> str | None:
+        """Return a random cached variant for the opener, if enough exist."""
+        with self.lock:
+            entry = self._live(key)
+            if entry and entry["samples"] >= self.min_variants:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                self.saved_seconds += self.avg_latency
+                return random.choice(entry["variants"])
+            self.misses += 1
+            return None
+
+    def put(self, key: tuple, response: str, latency: float):
+        """Store a fresh reply as a variant and record the round-trip it took."""
+        with self.lock:
+            self.fills += 1
+            self.avg_latency += (latency - self.avg_latency) / self.fills
+            entry = self._live(key)
+            if entry is None:
+                entry = self.entries[key] = {"created_at": time.time(), "samples": 0, "variants": []}
+            entry["samples"] += 1
+            if response not in entry["variants"] and len(entry["variants"]) < self.max_variants:
+                entry["variants"].append(response)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        """Return hit rate and estimated latency saved."""
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "saved_seconds": self.saved_seconds,
+                "entries": len(self.entries)
+            }
+
+@st.cache_resource(show_spinner=False)
+def get_response_cache() -> ResponseCache:
+    """Process-wide response cache shared by all sessions."""
+    return ResponseCache()
+
 # =============================================================================
 # LLM Operations
 # =============================================================================
+# Starts the vocabulary part of the system prompt (see build_system_prompt)
+VOCAB_MISSION_HEADER = "**Secret Mission (don't mention this):**"
+
 def build_system_prompt(about_me: str, vocab_words: list) -> str:
     """Build the system prompt with injected vocabulary."""
     base_prompt = f"""You are a friendly, warm, and curious chat companion.
@@ -496,16 +641,38 @@ def build_system_prompt(about_me: str, vocab_words: list) -> str:
         phrases = [v["target_phrase"] for v in selected]
         vocab_injection = f"""
 
-**Secret Mission (don't mention this):**
+{VOCAB_MISSION_HEADER}
 Naturally use these words/phrases in your responses when it fits: {', '.join(phrases)}
 When you use them, wrap in **bold** (e.g., **rain check**)."""
         base_prompt += vocab_injection
 
     return base_prompt
 
-def get_chat_response(client: OpenAI, model: str, system_prompt: str, messages: list) -> str:
-    """Get a response from the LLM."""
+def get_chat_response(router: ProviderRouter, endpoints: list, system_prompt: str, messages: list,
+                      cache: ResponseCache | None = None, session_start: int = 0) -> str:
+    """Get a response from the LLM, reusing a cached reply for small talk openers.
+    
+    `session_start` is the index of the first message sent in this session;
+    earlier messages are history loaded from the database. The cache key uses
+    the persona part of the system prompt only, since the injected vocabulary
+    is a random sample that changes every turn. Replies are cached under the
+    endpoint that answered, and looked up under the endpoint the router would
+    try first.
+    """
+    persona_prompt = system_prompt.split(VOCAB_MISSION_HEADER)[0].rstrip()
+    
+    def cache_key(endpoint: dict) -> tuple | None:
+        model = f"{endpoint['name']}/{endpoint['chat_model']}"
+        return cache.make_key(model, persona_prompt, messages[session_start:]) if cache else None
+    
+    key = cache_key(router.order(endpoints, "chat")[0]) if endpoints else None
+    if key is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+    
     try:
+        start = time.perf_counter()
         formatted_messages = [{"role": "system", "content": system_prompt}]
         for msg in messages:
             formatted_messages.append({
@@ -513,17 +680,21 @@ def get_chat_response(client: OpenAI, model: str, system_prompt: str, messages:
                 "content": msg["content"]
             })
         
-        response = client.chat.completions.create(
-            model=model,
-            messages=formatted_messages,
+        content, endpoint = router.complete(
+            endpoints,
+            "chat",
+            formatted_messages,
             temperature=0.7,
             max_tokens=1024
         )
-        return response.choices[0].message.content
+        key = cache_key(endpoint)
+        if key is not None:
+            cache.put(key, content, time.perf_counter() - start)
+        return content
     except Exception as e:
         return f"Error getting response: {e}"
 
-def analyze_user_input(client: OpenAI, model: str, user_input: str) -> dict:
+def analyze_user_input(router: ProviderRouter, endpoints: list, user_input: str) -> dict:
     """Analyze user input for grammar and suggest improvements (The Polisher)."""
     analysis_prompt = """You are an English language analyst. Analyze the following user input and provide:
 1. A more native-sounding version (if improvements can be made)
@@ -542,9 +713,10 @@ Respond in this exact JSON format:
 User input to analyze:"""
 
     try:
-        response = client.chat.completions.create(
-            model=model,
-            messages=[
+        content, _ = router.complete(
+            endpoints,
+            "polisher",
+            [
                 {"role": "system", "content": analysis_prompt},
                 {"role": "user", "content": user_input}
             ],
@@ -552,7 +724,6 @@ User input to analyze:"""
             max_tokens=256
         )
         
-        content = response.choices[0].message.content
         # Parse the JSON response
         try:
             # Handle potential markdown code blocks
@@ -582,14 +753,16 @@ def render_sidebar():
         st.title("🗣️ NativeEcho")
         
         # Page Navigation
+        pages = {"💬 Chat": "chat", "📚 Vocabulary": "vocab", "📈 Progress": "progress"}
         page = st.radio(
             "Navigate",
-            ["💬 Chat", "📚 Vocabulary"],
-            index=0 if st.session_state.get("current_page", "chat") == "chat" else 1,
+            list(pages),
+            index=list(pages.values()).index(st.session_state.get("current_page", "chat")),
+            key="nav_page",
             label_visibility="collapsed",
             horizontal=True
         )
-        st.session_state.current_page = "chat" if page == "💬 Chat" else "vocab"
+        st.session_state.current_page = pages[page]
         
         st.divider()
         
@@ -611,33 +784,86 @@ def render_sidebar():
         # Clear Chat Button
         if st.button("🗑️ Clear Chat History", use_container_width=True, type="secondary"):
             st.session_state.messages = []
+            st.session_state.loaded_history = 0
             st.rerun()
         
         # API Settings Section (collapsed by default)
         with st.expander("🔑 API Configuration", expanded=False):
             # Load defaults from config (secrets or session state)
-            default_api_key = get_config_value("siliconflow", "api_key")
-            default_base_url = get_config_value("siliconflow", "base_url")
-            default_model = get_config_value("siliconflow", "model")
+            providers = get_provider_configs()
+            
+            provider = st.selectbox(
+                "Provider",
+                list(providers),
+                key="llm_provider",
+                help="Primary OpenAI-compatible endpoint"
+            )
+            config = providers[provider]
             
             api_key = st.text_input(
                 "API Key",
-                value=default_api_key,
+                value=config.get("api_key", ""),
                 type="password",
-                help="Your SiliconFlow API key"
+                help="API key for this provider"
             )
             
-            model_name = st.text_input(
-                "Model Name",
-                value=default_model,
+            chat_model = st.text_input(
+                "Chat Model",
+                value=config.get("chat_model", ""),
                 help="The model to use for chat"
             )
             
+            polisher_model = st.text_input(
+                "Polisher Model",
+                value=config.get("polisher_model", ""),
+                help="The model to use for language feedback"
+            )
+            
             base_url = st.text_input(
                 "Base URL",
-                value=default_base_url,
+                value=config.get("base_url", ""),
                 help="API endpoint URL"
             )
+            
+            others = [name for name in providers if name != provider]
+            fallbacks = st.multiselect(
+                "Fallback Providers",
+                others,
+                default=[name for name in others if providers[name].get("configured")],
+                help="Used when the provider fails or its p95 latency degrades"
+            )
+            
+            endpoints = [{
+                **config,
+                "name": provider,
+                "api_key": api_key,
+                "base_url": base_url,
+                "chat_model": chat_model,
+                "polisher_model": polisher_model
+            }] + [{**providers[name], "name": name} for name in fallbacks]
+            
+            # Rolling health per endpoint (shared by all sessions)
+            router = get_provider_router()
+            for endpoint in endpoints:
+                chat, polisher = router.health(endpoint, "chat"), router.health(endpoint, "polisher")
+                if chat["samples"] or polisher["samples"]:
+                    status = "🔴" if chat["degraded"] or polisher["degraded"] else "🟢"
+                    st.caption(
+                        f"{status} {endpoint['name']}: p95 {chat['p95']:.1f}s chat / {polisher['p95']:.1f}s polisher, "
+                        f"{max(chat['error_rate'], polisher['error_rate']):.0%} errors"
+                    )
+            
+            st.toggle(
+                "⚡ Reuse replies for greetings",
+                key="use_response_cache",
+                help="Answer first-message greetings (e.g. \"Hi, how are you?\") from a cache of earlier replies"
+            )
+            if st.session_state.get("use_response_cache"):
+                stats = get_response_cache().stats()
+                st.caption(
+                    f"Cache: {stats['hits']} hits / {stats['misses']} misses "
+                    f"({stats['hit_rate']:.0%}), ~{stats['saved_seconds']:.1f}s saved"
+                )
         
         # Debug: Show last system prompt
         with st.expander("🐛 Debug: Last Prompt", expanded=False):
@@ -646,29 +872,88 @@ def render_sidebar():
             else:
                 st.caption("Send a message to see the prompt")
         
-        return api_key, model_name, base_url, about_me
+        return endpoints, about_me
+
+# =============================================================================
+# Transcript (built incrementally, cached in session state)
+# =============================================================================
+def content_hash(content: str) -> str:
+    """Short stable hash of a message's text."""
+    return hashlib.sha1(content.encode("utf-8")).hexdigest()
+
+def message_key(message: dict) -> tuple:
+    """Identify a message by its database id and content hash."""
+    return message.get("id"), content_hash(message["content"])
+
+def build_transcript_block(message: dict, feedback: dict | None) -> dict:
+    """Pre-format everything needed to render one message."""
+    block = {"key": message_key(message), "role": message["role"], "content": message["content"], "feedback": None}
+    if feedback:
+        block["feedback"] = (
+            f"**Native version:** {feedback.get('better_version', 'N/A')}",
+            f"**Tip:** {feedback.get('grammar_point', 'N/A')}"
+        )
+    return block
+
+def sync_transcript(supabase: Client) -> list:
+    """Bring the cached transcript up to date with st.session_state.messages.
+    
+    Only messages added since the last rerun are processed, and feedback for
+    their user inputs is loaded in one query. The transcript is rebuilt
+    from scratch only when the message history was replaced (e.g. cleared).
+    If the feedback query fails, the new messages are rendered without
+    feedback but not cached, so the next rerun retries.
+    """
+    messages = st.session_state.messages
+    blocks = st.session_state.setdefault("transcript", [])
+    feedback_cache = st.session_state.setdefault("feedback_cache", {})
+    
+    if len(blocks) > len(messages) or (blocks and blocks[-1]["key"] != message_key(messages[len(blocks) - 1])):
+        blocks.clear()
+    
+    new_messages = messages[len(blocks):]
+    if not new_messages:
+        return blocks
+    
+    missing = [
+        m["content"] for m in new_messages
+        if m["role"] == "user" and content_hash(m["content"]) not in feedback_cache
+    ]
+    if missing:
+        found = fetch_feedback_for_inputs(supabase, missing)
+        if found is None:
+            return blocks + [
+                build_transcript_block(m, feedback_cache.get(content_hash(m["content"])) if m["role"] == "user" else None)
+                for m in new_messages
+            ]
+        for user_input in missing:
+            feedback_cache[content_hash(user_input)] = found.get(user_input)
+    
+    for message in new_messages:
+        feedback = feedback_cache.get(content_hash(message["content"])) if message["role"] == "user" else None
+        blocks.append(build_transcript_block(message, feedback))
+    return blocks
 
 # =============================================================================
 # Main Chat UI
 # =============================================================================
-def render_chat_interface(supabase: Client, client: OpenAI, model: str, about_me: str):
+def render_chat_interface(supabase: Client, router: ProviderRouter, endpoints: list, about_me: str):
     """Render the main chat interface."""
     # Initialize messages from database if not in session state
     if "messages" not in st.session_state:
         st.session_state.messages = fetch_chat_history(supabase)
+        st.session_state.loaded_history = len(st.session_state.messages)
     
     # Display chat messages
-    for i, message in enumerate(st.session_state.messages):
-        with st.chat_message(message["role"]):
-            st.markdown(message["content"])
+    for block in sync_transcript(supabase):
+        with st.chat_message(block["role"]):
+            st.markdown(block["content"])
             
             # Show feedback for user messages
-            if message["role"] == "user":
-                feedback = fetch_feedback_for_input(supabase, message["content"])
-                if feedback:
-                    with st.expander("💡 Language Feedback", expanded=False):
-                        st.markdown(f"**Native version:** {feedback.get('better_version', 'N/A')}")
-                        st.markdown(f"**Tip:** {feedback.get('grammar_point', 'N/A')}")
+            if block["feedback"]:
+                with st.expander("💡 Language Feedback", expanded=False):
+                    st.markdown(block["feedback"][0])
+                    st.markdown(block["feedback"][1])
     
     # Input area with Add to Learning Plan button
     input_col, add_col = st.columns([12, 1])
@@ -687,8 +972,7 @@ def render_chat_interface(supabase: Client, client: OpenAI, model: str, about_me
     # Chat input
     if prompt := st.chat_input("Type your message in English..."):
         # Add user message to chat
-        st.session_state.messages.append({"role": "user", "content": prompt})
-        save_chat_message(supabase, "user", prompt)
+        st.session_state.messages.append(save_chat_message(supabase, "user", prompt))
         
         with st.chat_message("user"):
             st.markdown(prompt)
@@ -704,10 +988,12 @@ def render_chat_interface(supabase: Client, client: OpenAI, model: str, about_me
         with ThreadPoolExecutor(max_workers=2) as executor:
             # Submit both tasks
             chat_future = executor.submit(
-                get_chat_response, client, model, system_prompt, st.session_state.messages
+                get_chat_response, router, endpoints, system_prompt, st.session_state.messages,
+                get_response_cache() if st.session_state.get("use_response_cache") else None,
+                st.session_state.get("loaded_history", 0)
             )
             analysis_future = executor.submit(
-                analyze_user_input, client, model, prompt
+                analyze_user_input, router, endpoints, prompt
             )
             
             # Display chat response as soon as it's ready
@@ -717,8 +1003,7 @@ def render_chat_interface(supabase: Client, client: OpenAI, model: str, about_me
                     st.markdown(response)
             
             # Save assistant response
-            st.session_state.messages.append({"role": "assistant", "content": response})
-            save_chat_message(supabase, "assistant", response)
+            st.session_state.messages.append(save_chat_message(supabase, "assistant", response))
             
             # Get analysis result (should be ready or nearly ready)
             analysis = analysis_future.result()
@@ -728,6 +1013,8 @@ def render_chat_interface(supabase: Client, client: OpenAI, model: str, about_me
                 analysis.get("better_version", ""),
                 analysis.get("grammar_point", "")
             )
+            # Keep it for the transcript so it isn't fetched back
+            st.session_state.setdefault("feedback_cache", {})[content_hash(prompt)] = analysis
         
         st.rerun()
 
@@ -745,41 +1032,114 @@ def render_vocab_tab(supabase: Client):
     
     st.divider()
     
-    vocab = fetch_all_vocab(supabase)
+    counts = fetch_vocab_counts(supabase)
+    vocab_lists = {}
+    if counts is None:
+        # Counts view missing (migration not applied yet): count the rows instead
+        vocab_lists = {status: fetch_vocab_by_status(supabase, status) for status in ("active", "mastered")}
+        counts = {status: len(items) for status, items in vocab_lists.items()}
     
-    if not vocab:
+    if not sum(counts.values()):
         st.info("Your vocabulary vault is empty. Add some phrases to learn!")
+        return
+    
+    # Only the selected list is downloaded (st.tabs would run both bodies)
+    labels = {"active": "🎯 Active", "mastered": "✅ Mastered"}
+    status = st.radio(
+        "Status",
+        list(labels),
+        format_func=lambda s: f"{labels[s]} ({counts.get(s, 0)})",
+        key="vocab_status",
+        horizontal=True,
+        label_visibility="collapsed"
+    )
+    
+    if status not in vocab_lists:
+        vocab_lists[status] = fetch_vocab_by_status(supabase, status) if counts.get(status) else []
+    
+    if status == "active":
+        if vocab_lists["active"]:
+            for v in vocab_lists["active"]:
+                col1, col2 = st.columns([5, 1])
+                with col1:
+                    st.markdown(f"**{v['target_phrase']}**")
+                with col2:
+                    if st.button("✅", key=f"master_{v['id']}", help="Mark as mastered"):
+                        mark_vocab_mastered(supabase, v['id'])
+                        st.rerun()
+        else:
+            st.info("No active vocabulary items.")
     else:
-        # Sub-tabs for active and mastered
-        active_tab, mastered_tab = st.tabs(["🎯 Active", "✅ Mastered"])
-        
-        with active_tab:
-            active_vocab = [v for v in vocab if v.get("status") == "active"]
-            if active_vocab:
-                for v in active_vocab:
-                    col1, col2 = st.columns([5, 1])
-                    with col1:
-                        st.markdown(f"**{v['target_phrase']}**")
-                    with col2:
-                        if st.button("✅", key=f"master_{v['id']}", help="Mark as mastered"):
-                            mark_vocab_mastered(supabase, v['id'])
-                            st.rerun()
-            else:
-                st.info("No active vocabulary items.")
-        
-        with mastered_tab:
-            mastered_vocab = [v for v in vocab if v.get("status") == "mastered"]
-            if mastered_vocab:
-                for v in mastered_vocab:
-                    col1, col2 = st.columns([5, 1])
-                    with col1:
-                        st.markdown(f"**{v['target_phrase']}**")
-                    with col2:
-                        if st.button("🗑️", key=f"delete_{v['id']}", help="Delete"):
-                            delete_vocab(supabase, v['id'])
-                            st.rerun()
-            else:
-                st.info("No mastered vocabulary items yet.")
+        if vocab_lists["mastered"]:
+            for v in vocab_lists["mastered"]:
+                col1, col2 = st.columns([5, 1])
+                with col1:
+                    st.markdown(f"**{v['target_phrase']}**")
+                with col2:
+                    if st.button("🗑️", key=f"delete_{v['id']}", help="Delete"):
+                        delete_vocab(supabase, v['id'])
+                        st.rerun()
+        else:
+            st.info("No mastered vocabulary items yet.")
+
+def render_progress_tab(supabase: Client):
+    """Render learning statistics from server-side aggregates."""
+    summary = fetch_learning_summary(supabase)
+    
+    if not summary:
+        st.info("No statistics yet. Make sure the analytics migration in `supabase/migrations` is applied.")
+        return
+    
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Messages sent", summary.get("total_user_messages", 0))
+    col2.metric("Active days", summary.get("active_days", 0))
+    col3.metric("Correction rate", f"{float(summary.get('correction_rate') or 0):.0%}")
+    col4.metric(
+        "Mastered (30d)",
+        summary.get("mastered_last_30d", 0),
+        help=f"{summary.get('vocab_mastered', 0)} mastered, {summary.get('vocab_active', 0)} active"
+    )
+    
+    avg_days = summary.get("avg_days_to_master")
+    if avg_days is not None:
+        st.caption(f"On average a phrase is mastered {float(avg_days):.1f} days after you add it.")
+    
+    st.divider()
+    
+    days = st.radio(
+        "Range",
+        [7, 30, 90, 365],
+        index=1,
+        format_func=lambda d: f"Last {d} days",
+        horizontal=True,
+        label_visibility="collapsed"
+    )
+    stats = fetch_learning_stats(supabase, days)
+    
+    if not stats:
+        st.info("No activity in this period.")
+        return
+    
+    series = {
+        "day": [row["day"] for row in stats],
+        "Messages": [row["user_messages"] for row in stats],
+        "Corrections": [row["corrections"] for row in stats],
+        "Added": [row["vocab_added"] for row in stats],
+        "Mastered": [row["vocab_mastered"] for row in stats],
+        "Correction rate": [
+            row["corrections"] / row["feedback_count"] if row["feedback_count"] else None
+            for row in stats
+        ]
+    }
+    
+    st.subheader("💬 Messages per day")
+    st.line_chart(series, x="day", y=["Messages", "Corrections"])
+    
+    st.subheader("🎯 Correction rate")
+    st.line_chart(series, x="day", y="Correction rate")
+    
+    st.subheader("📚 Vocabulary")
+    st.line_chart(series, x="day", y=["Added", "Mastered"])
 
 # =============================================================================
 # Main App
@@ -791,6 +1151,9 @@ def main():
         render_setup_page()
         return
     
+    # Render sidebar first so the page paints before the clients are loaded
+    endpoints, about_me = render_sidebar()
+    
     # Initialize Supabase
     try:
         supabase = init_supabase()
@@ -803,21 +1166,14 @@ def main():
             st.rerun()
         st.stop()
     
-    # Render sidebar and get settings
-    api_key, model_name, base_url, about_me = render_sidebar()
-    
-    # Initialize OpenAI client
-    try:
-        client = get_openai_client(api_key, base_url)
-    except Exception as e:
-        st.error(f"Failed to initialize API client: {e}")
-        st.stop()
-    
     # Render content based on selected page
-    if st.session_state.get("current_page", "chat") == "chat":
-        render_chat_interface(supabase, client, model_name, about_me)
-    else:
+    current_page = st.session_state.get("current_page", "chat")
+    if current_page == "chat":
+        render_chat_interface(supabase, get_provider_router(), endpoints, about_me)
+    elif current_page == "vocab":
         render_vocab_tab(supabase)
+    else:
+        render_progress_tab(supabase)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,277 @@
+-- =============================================================================
+-- NativeEcho - Learning Analytics
+--
+-- Pre-aggregated views and RPC functions backing the "📈 Progress" page.
+-- The client only ever downloads a handful of rows (one per status / per day),
+-- no matter how large chat_logs, ai_feedback or vocab_vault grow.
+--
+-- Apply with `supabase db push` or paste into the Supabase SQL editor.
+-- =============================================================================
+
+-- -----------------------------------------------------------------------------
+-- Track when a phrase was mastered (needed for mastery velocity)
+-- -----------------------------------------------------------------------------
+alter table public.vocab_vault
+    add column if not exists mastered_at timestamptz;
+
+-- Phrases mastered before this column existed keep mastered_at = NULL: they
+-- still count by status, but don't distort mastery velocity or daily charts.
+
+create or replace function public.set_vocab_mastered_at()
+returns trigger
+language plpgsql
+as $$
+begin
+    if new.status = 'mastered' and old.status is distinct from 'mastered' then
+        new.mastered_at := now();
+    elsif new.status <> 'mastered' then
+        new.mastered_at := null;
+    end if;
+    return new;
+end;
+$$;
+
+drop trigger if exists vocab_vault_mastered_at on public.vocab_vault;
+create trigger vocab_vault_mastered_at
+    before update of status on public.vocab_vault
+    for each row execute function public.set_vocab_mastered_at();
+
+-- -----------------------------------------------------------------------------
+-- Indexes for time-range aggregation
+-- -----------------------------------------------------------------------------
+create index if not exists chat_logs_created_at_idx on public.chat_logs (created_at);
+create index if not exists ai_feedback_created_at_idx on public.ai_feedback (created_at);
+create index if not exists vocab_vault_created_at_idx on public.vocab_vault (created_at);
+create index if not exists vocab_vault_mastered_at_idx on public.vocab_vault (mastered_at);
+create index if not exists vocab_vault_status_idx on public.vocab_vault (status);
+
+-- -----------------------------------------------------------------------------
+-- Vocabulary counts per status (one row per status). security_invoker makes
+-- the view run with the caller's privileges, so vocab_vault's RLS applies.
+-- -----------------------------------------------------------------------------
+create or replace view public.vocab_status_counts
+with (security_invoker = true) as
+select status, count(*)::int as total
+from public.vocab_vault
+group by status;
+
+-- -----------------------------------------------------------------------------
+-- Daily rollup table, refreshed incrementally
+-- -----------------------------------------------------------------------------
+create table if not exists public.learning_stats_daily (
+    day                date primary key,
+    user_messages      int not null default 0,
+    assistant_messages int not null default 0,
+    feedback_count     int not null default 0,
+    corrections        int not null default 0,
+    vocab_added        int not null default 0,
+    vocab_mastered     int not null default 0,
+    refreshed_at       timestamptz not null default now()
+);
+
+-- Days whose rollup is stale because older rows were deleted or un-mastered
+create table if not exists public.learning_stats_dirty_days (
+    day date primary key
+);
+
+-- Only reachable through the security definer functions below
+alter table public.learning_stats_daily enable row level security;
+alter table public.learning_stats_dirty_days enable row level security;
+revoke all on public.learning_stats_daily from anon, authenticated;
+revoke all on public.learning_stats_dirty_days from anon, authenticated;
+
+create or replace function public.mark_learning_stats_dirty()
+returns trigger
+language plpgsql
+security definer
+set search_path = public
+as $$
+begin
+    if tg_op = 'DELETE' then
+        insert into learning_stats_dirty_days (day)
+            values (old.created_at::date)
+            on conflict do nothing;
+    end if;
+    -- Nested so mastered_at is only referenced on vocab_vault rows
+    if tg_table_name = 'vocab_vault' then
+        if old.mastered_at is not null
+           and (tg_op = 'DELETE' or new.mastered_at is distinct from old.mastered_at) then
+            insert into learning_stats_dirty_days (day)
+                values (old.mastered_at::date)
+                on conflict do nothing;
+        end if;
+    end if;
+    return null;
+end;
+$$;
+
+drop trigger if exists chat_logs_stats_dirty on public.chat_logs;
+create trigger chat_logs_stats_dirty
+    after delete on public.chat_logs
+    for each row execute function public.mark_learning_stats_dirty();
+
+drop trigger if exists ai_feedback_stats_dirty on public.ai_feedback;
+create trigger ai_feedback_stats_dirty
+    after delete on public.ai_feedback
+    for each row execute function public.mark_learning_stats_dirty();
+
+drop trigger if exists vocab_vault_stats_dirty on public.vocab_vault;
+create trigger vocab_vault_stats_dirty
+    after delete or update of status on public.vocab_vault
+    for each row execute function public.mark_learning_stats_dirty();
+
+-- Recompute only the days since the last refresh (the newest stored day is
+-- recomputed too, since it may have been partial) plus days marked dirty by
+-- the delete/update triggers. Pass full_rebuild => true after bulk imports.
+create or replace function public.refresh_learning_stats(full_rebuild boolean default false)
+returns int
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+    since_day date;
+    dirty date[];
+    affected int;
+begin
+    with cleared as (
+        delete from learning_stats_dirty_days returning day
+    )
+    select coalesce(array_agg(day), '{}') into dirty from cleared;
+
+    if full_rebuild then
+        delete from learning_stats_daily;
+        since_day := date '1970-01-01';
+    else
+        select coalesce(max(day), date '1970-01-01') into since_day from learning_stats_daily;
+        -- Dirty days may have no activity left, so drop them before recomputing
+        delete from learning_stats_daily where day = any(dirty);
+    end if;
+
+    with
+    msgs as (
+        select created_at::date as day,
+               count(*) filter (where role = 'user') as user_messages,
+               count(*) filter (where role = 'assistant') as assistant_messages
+        from chat_logs
+        where created_at >= since_day or created_at::date = any(dirty)
+        group by 1
+    ),
+    fb as (
+        select created_at::date as day,
+               count(*) as feedback_count,
+               count(*) filter (
+                   where better_version not ilike 'original is great%'
+                     and better_version not in ('', 'Unable to analyze', 'Error during analysis')
+               ) as corrections
+        from ai_feedback
+        where created_at >= since_day or created_at::date = any(dirty)
+        group by 1
+    ),
+    added as (
+        select created_at::date as day, count(*) as vocab_added
+        from vocab_vault
+        where created_at >= since_day or created_at::date = any(dirty)
+        group by 1
+    ),
+    mastered as (
+        select mastered_at::date as day, count(*) as vocab_mastered
+        from vocab_vault
+        where mastered_at >= since_day or mastered_at::date = any(dirty)
+        group by 1
+    ),
+    days as (
+        select day from msgs
+        union select day from fb
+        union select day from added
+        union select day from mastered
+    )
+    insert into learning_stats_daily as s (
+        day, user_messages, assistant_messages, feedback_count,
+        corrections, vocab_added, vocab_mastered, refreshed_at
+    )
+    select days.day,
+           coalesce(msgs.user_messages, 0),
+           coalesce(msgs.assistant_messages, 0),
+           coalesce(fb.feedback_count, 0),
+           coalesce(fb.corrections, 0),
+           coalesce(added.vocab_added, 0),
+           coalesce(mastered.vocab_mastered, 0),
+           now()
+    from days
+    left join msgs using (day)
+    left join fb using (day)
+    left join added using (day)
+    left join mastered using (day)
+    on conflict (day) do update set
+        user_messages      = excluded.user_messages,
+        assistant_messages = excluded.assistant_messages,
+        feedback_count     = excluded.feedback_count,
+        corrections        = excluded.corrections,
+        vocab_added        = excluded.vocab_added,
+        vocab_mastered     = excluded.vocab_mastered,
+        refreshed_at       = excluded.refreshed_at;
+
+    get diagnostics affected = row_count;
+    return affected;
+end;
+$$;
+
+revoke execute on function public.refresh_learning_stats(boolean) from public, anon, authenticated;
+
+-- -----------------------------------------------------------------------------
+-- RPC: daily time series for the last N days
+-- -----------------------------------------------------------------------------
+create or replace function public.get_learning_stats(days int default 30)
+returns setof public.learning_stats_daily
+language plpgsql
+security definer
+set search_path = public
+as $$
+begin
+    perform refresh_learning_stats();
+    return query
+        select *
+        from learning_stats_daily
+        where day > current_date - days
+        order by day;
+end;
+$$;
+
+-- -----------------------------------------------------------------------------
+-- RPC: headline numbers (single row)
+-- -----------------------------------------------------------------------------
+create or replace function public.get_learning_summary()
+returns table (
+    total_user_messages  bigint,
+    active_days          bigint,
+    feedback_count       bigint,
+    correction_rate      numeric,
+    vocab_active         bigint,
+    vocab_mastered       bigint,
+    mastered_last_30d    bigint,
+    avg_days_to_master   numeric
+)
+language plpgsql
+security definer
+set search_path = public
+as $$
+begin
+    perform refresh_learning_stats();
+    return query
+    select
+        coalesce(sum(s.user_messages), 0)::bigint,
+        count(*) filter (where s.user_messages > 0),
+        coalesce(sum(s.feedback_count), 0)::bigint,
+        round(coalesce(sum(s.corrections)::numeric / nullif(sum(s.feedback_count), 0), 0), 3),
+        (select count(*) from vocab_vault where status = 'active'),
+        (select count(*) from vocab_vault where status = 'mastered'),
+        (select count(*) from vocab_vault where mastered_at > now() - interval '30 days'),
+        (select round(avg(extract(epoch from (mastered_at - created_at)) / 86400)::numeric, 1)
+            from vocab_vault where mastered_at is not null)
+    from learning_stats_daily s;
+end;
+$$;
+
+-- Optional: keep the rollup warm with pg_cron instead of refreshing on read
+-- select cron.schedule('refresh-learning-stats', '*/15 * * * *', 'select public.refresh_learning_stats()');
@@ -0,0 +1,24 @@
+-- =============================================================================
+-- NativeEcho - Transcript Feedback Lookup
+--
+-- Returns the first AI feedback row per user input, deduplicated in Postgres.
+-- A filter like `user_input in (...)` returns every matching row, so an input
+-- the learner repeats often (e.g. "Hi") could fill the PostgREST max-rows cap
+-- and push the other inputs out of the response.
+--
+-- Apply with `supabase db push` or paste into the Supabase SQL editor.
+-- =============================================================================
+
+create index if not exists ai_feedback_user_input_idx on public.ai_feedback (user_input, id);
+
+-- Runs with the caller's privileges, so ai_feedback's RLS still applies
+create or replace function public.get_first_feedback(inputs text[])
+returns table (user_input text, better_version text, grammar_point text)
+language sql
+stable
+as $$
+    select distinct on (f.user_input) f.user_input, f.better_version, f.grammar_point
+    from public.ai_feedback f
+    where f.user_input = any(inputs)
+    order by f.user_input, f.id;
+$$;